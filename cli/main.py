@@ -3,31 +3,26 @@ CLI entry: qsgd bench, qsgd doctor, qsgd cache purge, qsgd providers list
 """
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 import typer
-from quantum.providers import _provider_map, get_provider
-from quantum.cache import CircuitCache
-from optim import SGD_QAE
+from utils import HAS_TORCH, HAS_QISKIT, HAS_BRAKET
 cli = typer.Typer()
 
 @cli.command()
 def doctor():
     """Check environment, quantum SDKs, GPU, credentials."""
-    try:
+    # Probe the SDK imports in parallel; they are disk-bound, so wall time ~ the slowest one
+    probes = (HAS_TORCH, HAS_QISKIT, HAS_BRAKET)
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        has_torch, has_qiskit, has_braket = pool.map(bool, probes)
+    if has_torch:
         import torch
         print('Torch:', torch.__version__)
-    except Exception:
+    else:
         print('Torch not found')
-    try:
-        import qiskit
-        print('Qiskit OK')
-    except Exception:
-        print('Qiskit not found')
-    try:
-        import braket
-        print('Braket SDK OK')
-    except Exception:
-        print('Braket not found')
+    print('Qiskit OK' if has_qiskit else 'Qiskit not found')
+    print('Braket SDK OK' if has_braket else 'Braket not found')
     # IBM creds status
     print('IBM Quantum credentials:')
     print(' - QISKIT_IBM_TOKEN:', 'set' if os.environ.get('QISKIT_IBM_TOKEN') else 'missing')
@@ -38,6 +33,7 @@ def doctor():
 @cli.command()
 def providers():
     """List supported quantum providers."""
+    from quantum.providers import _provider_map, get_provider
     for k in _provider_map.keys():
         print(f"Provider: {k}")
     # Show auto-detected selection
@@ -47,6 +43,7 @@ def providers():
 @cli.command()
 def cache_purge():
     """Remove all cached circuit files."""
+    from quantum.cache import CircuitCache
     cc = CircuitCache(None)
     cc.purge()
     print("Cache purged.")
@@ -71,6 +68,7 @@ def bench(
     except Exception as e:
         print('PyTorch is required for benchmarking:', e)
         return
+    from optim import SGD_QAE
 
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     x = torch.randn(n, d, device=device)
@@ -14,5 +14,10 @@ class Config:
             except Exception:
                 pass
         self._prefix = "QOPT_"
+        # QOPT_* keys resolved once, so get() is a single dict lookup
+        n = len(self._prefix)
+        self._resolved = {k[n:].lower(): v for k, v in self.vars.items()
+                          if isinstance(k, str)  # YAML allows int/bool keys
+                          and k.startswith(self._prefix) and k[n:] == k[n:].upper()}
     def get(self, key, default=None):
-        return self.vars.get(self._prefix + key.upper(), default)
+        return self._resolved.get(key.lower(), default)
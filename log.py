@@ -3,31 +3,133 @@ Structured logging: stepwise JSONL, TensorBoard, debug/fallbacks, quantum metric
 """
 import os
 import json
+import math
+import atexit
+import weakref
+from functools import cached_property
+from numbers import Integral, Real
+
+def _json_dumps(obj):
+	return json.dumps(obj, default=float).encode()
+
+def _has_nonfinite(obj):
+	if isinstance(obj, Real) and not isinstance(obj, Integral):
+		return not math.isfinite(obj)
+	if isinstance(obj, dict):
+		return any(_has_nonfinite(v) for v in obj.values())
+	if isinstance(obj, (list, tuple)):
+		return any(_has_nonfinite(v) for v in obj)
+	return False
 
 try:
-	from torch.utils.tensorboard import SummaryWriter  # optional
-	export_tb = True
+	import orjson  # optional, C-accelerated JSON encoding
+	def _dumps(obj):
+		# orjson writes NaN/inf as null; keep json's NaN/Infinity so divergence shows.
+		# default=float covers float subclasses (np.float64), which orjson rejects
+		if _has_nonfinite(obj):
+			return _json_dumps(obj)
+		return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY, default=float)
 except Exception:
-	SummaryWriter = None
-	export_tb = False
+	_dumps = _json_dumps
+
+# Steps between TensorBoard flushes; scalars are staged in memory in between
+TB_FLUSH_EVERY = 50
+
+# Steps whose tensor losses are copied to host together (one device sync per batch)
+LOSS_RESOLVE_EVERY = 32
+
+# Loggers still open at interpreter exit get their buffers flushed here
+_open_loggers = weakref.WeakSet()
+
+@atexit.register
+def _close_open_loggers():
+    for logger in list(_open_loggers):
+        logger.close()
 
 class Logger:
     def __init__(self, log_dir=None):
+        # Nothing touches disk or imports tensorboard until the first log_step
         self.log_dir = log_dir or './runs/qopt'
-        os.makedirs(self.log_dir, exist_ok=True)
-        self.writer = SummaryWriter(self.log_dir) if SummaryWriter else None
         self.jsonl_path = os.path.join(self.log_dir, "log.jsonl")
+        self._jsonl_fp = None
+        self._tb_pending = []
+        self._steps_pending = []
+        # Registered up front: buffered steps must be flushed at exit even if the
+        # JSONL file was never opened
+        _open_loggers.add(self)
+    @cached_property
+    def writer(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        try:
+            from torch.utils.tensorboard import SummaryWriter  # optional
+        except Exception:
+            return None
+        return SummaryWriter(self.log_dir)
+    def _open_jsonl(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        # One long-lived buffered handle instead of open/close per step
+        self._jsonl_fp = open(self.jsonl_path, "ab", buffering=64 * 1024)
+        _open_loggers.add(self)  # again, in case it was reopened after close()
     def log_step(self, stats):
+        # stats['loss'] may be a detached device tensor; it is resolved to a float in
+        # batches so logging does not force a GPU->CPU sync on every step
         step = getattr(self, 'step', 0)
         stats['step'] = step
+        self.step = step + 1
+        self._steps_pending.append(stats)
+        if len(self._steps_pending) >= LOSS_RESOLVE_EVERY:
+            self._resolve_steps()
+    def _resolve_steps(self):
+        pending = self._steps_pending
+        losses = [s['loss'] for s in pending if hasattr(s.get('loss'), 'detach')]
+        if losses:
+            import torch
+            # reshape(()) keeps .item() semantics: (1,)-shaped losses become floats
+            values = iter(torch.stack([l.reshape(()) for l in losses]).cpu().tolist())
+            for stats in pending:
+                if hasattr(stats.get('loss'), 'detach'):
+                    stats['loss'] = next(values)
+        # Records leave the buffer only once written, so a failing write loses nothing
+        written = 0
+        try:
+            for stats in pending:
+                self._write_step(stats)
+                written += 1
+        finally:
+            del pending[:written]
+    def _write_step(self, stats):
+        step = stats['step']
         if self.writer:
-            self.writer.add_scalar('loss', stats.get('loss', 0), step)
-            self.writer.add_scalar('fallback', int(stats.get('fallback', False)), step)
+            self._tb_pending.append(('loss', stats.get('loss', 0), step))
+            self._tb_pending.append(('fallback', int(stats.get('fallback', False)), step))
             if stats.get('ae_precision') is not None:
-                self.writer.add_scalar('ae_precision', stats.get('ae_precision'), step)
-        with open(self.jsonl_path, "a") as f:
-            f.write(json.dumps(stats) + "\n")
-        self.step = step + 1
+                self._tb_pending.append(('ae_precision', stats.get('ae_precision'), step))
+            if (step + 1) % TB_FLUSH_EVERY == 0:
+                self._flush_tb()
+        if self._jsonl_fp is None:
+            self._open_jsonl()
+        self._jsonl_fp.write(_dumps(stats) + b"\n")
+    def _flush_tb(self):
+        for tag, value, step in self._tb_pending:
+            self.writer.add_scalar(tag, value, step)
+        self._tb_pending.clear()
+    def flush(self):
+        if self._steps_pending:
+            self._resolve_steps()
+        if self._tb_pending:
+            self._flush_tb()
+        if self._jsonl_fp is not None and not self._jsonl_fp.closed:
+            self._jsonl_fp.flush()
+    def close(self):
+        self.flush()
+        if self._jsonl_fp is not None:
+            self._jsonl_fp.close()
+        _open_loggers.discard(self)
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     def log_qae(self, qmeta):
         # Log quantum call stats
         pass
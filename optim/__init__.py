@@ -1,6 +1,14 @@
-from .sgd_qae import SGD_QAE
+from typing import TYPE_CHECKING
 
-__all__ = [
-	"SGD_QAE",
-]
+from utils import lazy_exports
 
+if TYPE_CHECKING:
+	from .sgd_qae import SGD_QAE
+
+_lazy = {
+	"SGD_QAE": ".sgd_qae",
+}
+
+__all__ = tuple(_lazy)
+
+__getattr__, __dir__ = lazy_exports(__name__, _lazy)
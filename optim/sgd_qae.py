@@ -7,7 +7,6 @@ from torch.optim.optimizer import Optimizer
 from quantum.ae import QuantumGradientEstimator
 from runtime.orchestrator import Scheduler
 from log import Logger
-from oracles import builtins as oracles
 
 class SGD_QAE(Optimizer):
     r"""
@@ -62,27 +61,28 @@ class SGD_QAE(Optimizer):
         self.scheduler = Scheduler()
         self.logger = Logger(log_dir=log_dir)
 
-        # Backing PyTorch SGD optimizer for trusted classical updates
-        self._torch_sgd = torch.optim.SGD(
-            params,
-            lr=lr,
-            momentum=momentum,
-            weight_decay=weight_decay,
-            nesterov=nesterov,
-        )
-
     @torch.no_grad()
     def step(self, closure=None):
-        loss = closure() if closure is not None else None
+        loss = None
+        if closure is not None:
+            with torch.enable_grad():
+                loss = closure()
 
-        # Gather gradients after regular backward pass
+        # Gather gradients after regular backward pass, remembering each group's count.
+        # Only the quantum path hands grads to a user oracle, so only it takes a copy;
+        # classical paths use p.grad directly (the update below never mutates it)
+        copy_grads = self.use_quantum and not self.fallback and self.build_oracle is not None
         grads = []
         params_with_grad = []
+        group_sizes = []
         for group in self.param_groups:
+            n = 0
             for p in group['params']:
                 if p.grad is not None:
                     params_with_grad.append(p)
-                    grads.append(p.grad.detach().clone())
+                    grads.append(p.grad.detach().clone() if copy_grads else p.grad)
+                    n += 1
+            group_sizes.append(n)
 
         # Quantum or classical estimate (with fallback)
         try:
@@ -104,22 +104,48 @@ class SGD_QAE(Optimizer):
             self.logger.log_fallback(qmeta)
             est_grads = grads
 
-        # Delegate the parameter update to a real torch.optim.SGD for correctness
-        # Set the current step gradients to the estimated ones, then step
-        for idx, p in enumerate(params_with_grad):
-            p.grad = est_grads[idx]
-        if closure is None:
-            self._torch_sgd.step()
-        else:
-            self._torch_sgd.step(closure)
+        # Apply the SGD update group by group with the estimated gradients
+        start = 0
+        for group, n in zip(self.param_groups, group_sizes):
+            self._sgd_update(group, params_with_grad[start:start + n], list(est_grads[start:start + n]))
+            start += n
 
         self.logger.log_step({
-            'loss': loss.item() if loss is not None else None,
+            # Detached tensor; the logger batches the .item() sync across steps
+            'loss': loss.detach() if loss is not None else None,
             'fallback': self.fallback,
             'quantum_mode': qmeta.get('mode'),
             'ae_precision': self.ae_precision,
         })
         return loss
 
+    def _sgd_update(self, group, params, grads):
+        # Same math as torch.optim.SGD (dampening=0), but one multi-tensor
+        # torch._foreach_* op per stage instead of one op per parameter tensor
+        if not params:
+            return
+        lr = group['lr']
+        momentum = group['momentum']
+        weight_decay = group['weight_decay']
+        if weight_decay != 0:
+            # Out-of-place so the caller's gradient tensors are never mutated
+            grads = torch._foreach_add(grads, params, alpha=weight_decay)
+        if momentum != 0:
+            bufs = [self.state[p].get('momentum_buffer') for p in params]
+            if any(buf is None for buf in bufs):
+                for i, (p, g) in enumerate(zip(params, grads)):
+                    if bufs[i] is None:
+                        bufs[i] = self.state[p]['momentum_buffer'] = torch.clone(g).detach()
+                    else:
+                        bufs[i].mul_(momentum).add_(g)
+            else:
+                torch._foreach_mul_(bufs, momentum)
+                torch._foreach_add_(bufs, grads)
+            if group['nesterov']:
+                grads = torch._foreach_add(grads, bufs, alpha=momentum)
+            else:
+                grads = bufs
+        torch._foreach_add_(params, grads, alpha=-lr)
+
 # Alias for API convenience
 SGD_QAE = SGD_QAE
@@ -51,9 +51,24 @@ def train_with_sklearn_sgd(
 	# Auto-detect problem type if not provided
 	ptype = problem
 	if ptype is None:
-		# Heuristic: discrete integer labels -> classification; else regression
-		unique = np.unique(y)
-		ptype = "classification" if np.issubdtype(unique.dtype, np.integer) and unique.size <= 1000 else "regression"
+		# Heuristic: discrete integer labels -> classification; else regression.
+		# dtype is checked first (O(1)); a label range under 1000 bounds the number
+		# of distinct labels without sorting (O(N)). Only wide ranges count uniques,
+		# chunk by chunk, stopping as soon as there are more than 1000
+		y_arr = np.asarray(y)
+		if np.issubdtype(y_arr.dtype, np.integer):
+			flat = y_arr.reshape(-1)
+			if flat.size == 0 or int(flat.max()) - int(flat.min()) < 1000:
+				ptype = "classification"
+			else:
+				uniques = np.unique(flat[:10_000])
+				for start in range(10_000, flat.size, 10_000):
+					if uniques.size > 1000:
+						break
+					uniques = np.union1d(uniques, flat[start:start + 10_000])
+				ptype = "classification" if uniques.size <= 1000 else "regression"
+		else:
+			ptype = "regression"
 
 	if ptype == "classification":
 		model = SGDClassifier(
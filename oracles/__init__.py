@@ -1,9 +1,18 @@
-from .builtins import logistic_oracle, mse_oracle, softmax_oracle, custom_oracle
+from typing import TYPE_CHECKING
 
-__all__ = [
-	"logistic_oracle",
-	"mse_oracle",
-	"softmax_oracle",
-	"custom_oracle",
-]
+from utils import lazy_exports
 
+if TYPE_CHECKING:
+	from .builtins import logistic_oracle, mse_oracle, softmax_oracle, custom_oracle, scaled_bounds
+
+_lazy = {
+	"logistic_oracle": ".builtins",
+	"mse_oracle": ".builtins",
+	"softmax_oracle": ".builtins",
+	"custom_oracle": ".builtins",
+	"scaled_bounds": ".builtins",
+}
+
+__all__ = tuple(_lazy)
+
+__getattr__, __dir__ = lazy_exports(__name__, _lazy)
@@ -1,34 +1,79 @@
 """
 Quantum oracles: built-in (logistic, mse, softmax), custom user API.
 """
+import functools
+from numbers import Real
+from typing import NamedTuple, Union
+
 import torch
+import torch.nn.functional as F
+
+class ScaledBounds(NamedTuple):
+    # Loss bounds as (min, 1 / (max - min)) so oracles scale with a multiply
+    minv: Union[float, torch.Tensor]
+    inv_range: Union[float, torch.Tensor]
+
+def scaled_bounds(minv, maxv):
+    # Build once per oracle configuration and pass as `bounds`
+    if isinstance(minv, Real) and isinstance(maxv, Real):
+        span = float(maxv) - float(minv)
+        # Degenerate range scales like the tensor division did (inf/nan, then clamp)
+        return ScaledBounds(float(minv), 1.0 / span if span else float('inf'))
+    # Tensor bounds stay tensors: float() on a CUDA tensor would sync the device
+    return ScaledBounds(minv, 1 / (maxv - minv))
+
+def _as_scaled(bounds):
+    # Plain (minv, maxv) tuples are still accepted and converted per call
+    if isinstance(bounds, ScaledBounds):
+        return bounds
+    return scaled_bounds(*bounds)
+
+# Pointwise tails are TorchScript so the fuser emits one kernel for the whole
+# loss -> scale -> clamp chain instead of one per op. Scripted on first use via
+# _scripted(), so importing this module does not pay the compile
+
+def _scale(loss, minv: float, inv_range: float):
+    return torch.clamp((loss - minv) * inv_range, 0.0, 1.0)
+
+def _mse_scaled(preds, y, minv: float, inv_range: float):
+    return torch.clamp(((preds - y) ** 2 - minv) * inv_range, 0.0, 1.0)
+
+@functools.lru_cache(maxsize=None)
+def _scripted(fn):
+    return torch.jit.script(fn)
+
+def _is_float_bounds(minv, inv_range):
+    # The scripted kernels take Python floats; tensor bounds use the eager ops
+    return isinstance(minv, Real) and isinstance(inv_range, Real)
+
+def _scale_loss(loss, bounds):
+    minv, inv_range = _as_scaled(bounds)
+    if _is_float_bounds(minv, inv_range):
+        return _scripted(_scale)(loss, minv, inv_range)
+    return torch.clamp((loss - minv) * inv_range, 0.0, 1.0)
 
 def logistic_oracle(batch, params, indices, bounds):
     # Example: logistic regression loss mapped to [0,1]
     X, y = batch
     logits = X @ params
-    pred = torch.sigmoid(logits)
-    loss = -(y * torch.log(pred+1e-8) + (1 - y) * torch.log(1 - pred + 1e-8))
-    minv, maxv = bounds
-    scaled = (loss - minv) / (maxv - minv)
-    return torch.clamp(scaled, 0, 1)
+    # Fused sigmoid + log, numerically stable without the +1e-8 guard
+    loss = F.binary_cross_entropy_with_logits(logits, y.to(logits.dtype), reduction='none')
+    return _scale_loss(loss, bounds)
 
 def mse_oracle(batch, params, indices, bounds):
     X, y = batch
     preds = X @ params
-    loss = (preds - y) ** 2
-    minv, maxv = bounds
-    scaled = (loss - minv) / (maxv - minv)
-    return torch.clamp(scaled, 0, 1)
+    minv, inv_range = _as_scaled(bounds)
+    if _is_float_bounds(minv, inv_range):
+        return _scripted(_mse_scaled)(preds, y, minv, inv_range)
+    return torch.clamp(((preds - y) ** 2 - minv) * inv_range, 0.0, 1.0)
 
 def softmax_oracle(batch, params, indices, bounds):
     X, y = batch
     logits = X @ params
-    pred = torch.softmax(logits, dim=-1)
-    loss = -torch.log(pred[range(len(y)), y])
-    minv, maxv = bounds
-    scaled = (loss - minv) / (maxv - minv)
-    return torch.clamp(scaled, 0, 1)
+    # Fused log-softmax + NLL; no host-built range() index or softmax intermediate
+    loss = F.cross_entropy(logits, y, reduction='none')
+    return _scale_loss(loss, bounds)
 
 def custom_oracle(batch, params, indices, bounds, fn):
     # Calls user fn(batch, params, indices, bounds) → [0,1]
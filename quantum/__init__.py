@@ -1,8 +1,16 @@
-from .ae import QuantumGradientEstimator
-from .providers import get_provider
+from typing import TYPE_CHECKING
 
-__all__ = [
-	"QuantumGradientEstimator",
-	"get_provider",
-]
+from utils import lazy_exports
 
+if TYPE_CHECKING:
+	from .ae import QuantumGradientEstimator
+	from .providers import get_provider
+
+_lazy = {
+	"QuantumGradientEstimator": ".ae",
+	"get_provider": ".providers",
+}
+
+__all__ = tuple(_lazy)
+
+__getattr__, __dir__ = lazy_exports(__name__, _lazy)
@@ -39,8 +39,9 @@ class QuantumGradientEstimator:
             if is_sim or build_oracle is None:
                 qmeta['mode'] = 'classical-mc'
                 qmeta['quantum'] = False
-                ests = [grad.clone() for grad in grads]
-                return ests, qmeta
+                # No-op passthrough: the classical estimate is the gradient itself,
+                # and the optimizer update never mutates it, so no copy is made
+                return grads, qmeta
             # Compose batch circuits for quantum provider
             # If build_oracle is provided, create a zero-arg closure per grad
             # Otherwise, pass through the grad directly
@@ -52,6 +53,11 @@ class QuantumGradientEstimator:
                     oracle = (lambda g=grad, i=idx: build_oracle(g, i))
                 oracles.append(oracle)
             results = self.provider.run_ae(oracles, shots=self.shots, epsilon=self.precision, mode=self.mode)
+            errors = getattr(self.provider, 'last_errors', None)
+            if errors:
+                # Oracles that failed individually keep their classical gradient
+                results = [grads[i] if r is None else r for i, r in enumerate(results)]
+                qmeta['oracle_errors'] = {i: str(e) for i, e in errors.items()}
             qmeta['mode'] = 'quantum'
             qmeta['quantum'] = True
             return results, qmeta
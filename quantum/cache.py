@@ -1,30 +1,263 @@
 """
 File-based cache for compiled circuits/results, auto-invalidated on hash/version change.
 """
+import io
 import os
+import sys
+import time
 import pickle
-from hashlib import sha256
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+
+try:
+    import xxhash  # optional, ~10x faster than hashlib for cache keys
+except Exception:
+    xxhash = None
+
+try:
+    import zstandard  # optional, transpiled circuits compress ~5-10x
+except Exception:
+    zstandard = None
+
+try:
+    import lmdb  # optional, persists ResultCache across runs
+except Exception:
+    lmdb = None
+
+# Entry layout: 1-byte codec (Z=zstd, R=raw) + 1-byte format (Q=qpy, P=pickle) + payload.
+# Files without this header are pre-compression pickles and are still readable.
+_CODECS = (b'Z', b'R')
+
+def _is_circuit(value):
+    # Only check once qiskit is already loaded; never import it just to test
+    if 'qiskit' not in sys.modules:
+        return False
+    from qiskit.circuit import QuantumCircuit
+    return isinstance(value, QuantumCircuit)
+
+def _dumps(value):
+    if _is_circuit(value):
+        from qiskit import qpy
+        buf = io.BytesIO()
+        qpy.dump(value, buf)
+        fmt, payload = b'Q', buf.getvalue()
+    else:
+        fmt, payload = b'P', pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if zstandard is not None:
+        return b'Z' + fmt + zstandard.ZstdCompressor(level=3).compress(payload)
+    return b'R' + fmt + payload
+
+def _loads(data):
+    codec, fmt, payload = data[:1], data[1:2], data[2:]
+    if codec not in _CODECS:
+        return pickle.loads(data)
+    if codec == b'Z':
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    if fmt == b'Q':
+        from qiskit import qpy
+        return qpy.load(io.BytesIO(payload))[0]
+    return pickle.loads(payload)
+
+# Decoded entries CircuitCache keeps in memory (LRU) to skip disk reads on repeat lookups
+_MEM_MAX = 256
+
+def _circuit_bytes(qc):
+    # Complete QPY serialization, so any change to the circuit (including full-precision
+    # gate matrices/angles) changes the key. Per-instance identity is normalized away:
+    # auto-generated circuit names and Parameter UUIDs would otherwise make every
+    # freshly built copy of the same circuit hash differently.
+    import uuid
+    from qiskit import qpy
+    from qiskit.circuit import Parameter
+    if qc.parameters:
+        try:
+            qc = qc.assign_parameters({p: Parameter(p.name, uuid=uuid.UUID(int=i))
+                                       for i, p in enumerate(qc.parameters)})
+        except Exception:
+            pass  # key stays correct, it just won't match across fresh Parameter objects
+    else:
+        qc = qc.copy()
+    qc.name = '_'
+    buf = io.BytesIO()
+    qpy.dump(qc, buf)
+    return buf.getvalue()
+
+def _key_bytes(obj):
+    # Bytes for hashing: QPY for circuits, pickle (falling back to repr) for everything else
+    if _is_circuit(obj):
+        return b'Q' + _circuit_bytes(obj)
+    if isinstance(obj, (tuple, list)):
+        return b'(' + b','.join(_key_bytes(o) for o in obj) + b')'
+    try:
+        return b'P' + pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return b'R' + repr(obj).encode()
 
 class CircuitCache:
     def __init__(self, cache_dir):
         self.cache_dir = cache_dir or os.path.expanduser('~/.qopt/cache')
         os.makedirs(self.cache_dir, exist_ok=True)
+        self._mem = OrderedDict()  # key -> value, bounded LRU in front of the disk
     def _hash(self, obj):
-        return sha256(pickle.dumps(obj)).hexdigest()
+        # Recomputed on every call: circuits are mutable, so a memo by identity goes stale
+        data = _key_bytes(obj)
+        if xxhash is not None:
+            return xxhash.xxh3_128(data).hexdigest()
+        return blake2b(data, digest_size=16).hexdigest()
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if len(self._mem) > _MEM_MAX:
+            self._mem.popitem(last=False)
     def get(self, key):
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._mem[key]
         path = os.path.join(self.cache_dir, f'{key}.pkl')
         if not os.path.exists(path):
             return None
         try:
             with open(path, 'rb') as f:
-                return pickle.load(f)
+                value = _loads(f.read())
         except Exception:
-            return None # corrupted
+            return None # corrupted, or zstd entry without zstandard installed
+        self._remember(key, value)
+        return value
     def set(self, key, value):
         path = os.path.join(self.cache_dir, f'{key}.pkl')
         with open(path, 'wb') as f:
-            pickle.dump(value, f)
+            f.write(_dumps(value))
+        self._remember(key, value)
     def purge(self):
+        self._mem.clear()
         for file in os.listdir(self.cache_dir):
             if file.endswith('.pkl'):
                 os.remove(os.path.join(self.cache_dir, file))
+
+
+def _qasm(qc):
+    # OpenQASM 2 text for a circuit (qiskit>=1.0 moved it out of QuantumCircuit)
+    try:
+        from qiskit import qasm2
+        return qasm2.dumps(qc)
+    except ImportError:
+        return qc.qasm()
+
+def result_key(qc, observable, shots, target):
+    """Key for a (circuit, observable, shots) result on `target` (a device fingerprint string),
+    or None if the circuit has no QASM form."""
+    try:
+        qasm = _qasm(qc)
+    except Exception:
+        return None  # e.g. unbound parameters
+    h = blake2b(digest_size=16)
+    h.update(qasm.encode())
+    h.update(repr(observable.to_list()).encode())
+    h.update(int(shots).to_bytes(8, 'little'))
+    h.update(target.encode())
+    return h.digest()
+
+# One LMDB environment per directory per process: py-lmdb corrupts data (or crashes)
+# if the same environment is opened twice, and several providers may share a path
+_lmdb_envs = {}
+_lmdb_lock = threading.Lock()
+
+def _open_env(path, map_size):
+    real = os.path.realpath(path)
+    with _lmdb_lock:
+        env = _lmdb_envs.get(real)
+        if env is None:
+            os.makedirs(real, exist_ok=True)
+            env = _lmdb_envs[real] = lmdb.open(real, map_size=map_size)
+        return env
+
+class ResultCache:
+    """Bounded LRU of estimator results, mirrored to LMDB (pruned to the same bound)
+    when `lmdb` is installed.
+
+    Entries expire after `ttl` seconds (None keeps them forever): a hardware result is one
+    noisy sample of a drifting device, so it must not be replayed indefinitely.
+    """
+    def __init__(self, path=None, max_entries=4096, map_size=1 << 28, ttl=3600.0):
+        self.path = path or os.path.expanduser('~/.qopt/results')
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._mem = OrderedDict()
+        self._env = None
+        if lmdb is not None:
+            try:
+                self._env = _open_env(self.path, map_size)
+            except Exception:
+                self._env = None  # unwritable path: memory-only
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+    def _fresh(self, entry):
+        return self.ttl is None or time.time() - entry[0] < self.ttl
+    def get(self, key):
+        entry = self._mem.get(key)
+        if entry is None and self._env is not None:
+            with self._env.begin() as txn:
+                raw = txn.get(key)
+            if raw is not None:
+                entry = pickle.loads(raw)
+        if entry is None:
+            return None
+        if not self._fresh(entry):
+            self._mem.pop(key, None)
+            if self._env is not None:
+                try:
+                    with self._env.begin(write=True) as txn:
+                        txn.delete(key)
+                except Exception:
+                    pass
+            return None
+        self._remember(key, entry)
+        return entry[1]
+    def _prune(self, txn):
+        # Drop expired entries, then the oldest until ~90% of max_entries, so the
+        # full scan runs at most once per max_entries/10 writes
+        keep = []
+        with txn.cursor() as cur:
+            for key, raw in cur:
+                try:
+                    entry = pickle.loads(raw)
+                except Exception:
+                    entry = None
+                if not (isinstance(entry, tuple) and len(entry) == 2) or not self._fresh(entry):
+                    txn.delete(key)
+                else:
+                    keep.append((entry[0], key))
+        excess = len(keep) - self.max_entries * 9 // 10
+        if excess > 0:
+            for _, key in sorted(keep)[:excess]:
+                txn.delete(key)
+    def _persist(self, key, raw):
+        with self._env.begin(write=True) as txn:
+            txn.put(key, raw)
+            if txn.stat()['entries'] > self.max_entries:
+                self._prune(txn)
+    def set(self, key, value):
+        entry = (time.time(), value)
+        self._remember(key, entry)
+        if self._env is not None:
+            raw = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            try:
+                self._persist(key, raw)
+            except lmdb.MapFullError:
+                try:
+                    with self._env.begin(write=True) as txn:
+                        self._prune(txn)
+                    self._persist(key, raw)
+                except Exception:
+                    pass  # still full (entries larger than the map): memory only
+            except Exception:
+                pass  # disk error: keep the in-memory entry only
+    def clear(self):
+        self._mem.clear()
+        if self._env is not None:
+            with self._env.begin(write=True) as txn:
+                txn.drop(self._env.open_db(), delete=False)
@@ -1,16 +1,113 @@
 """
 Quantum backend providers (Qiskit, Braket, Sim/local), cloud config, retry/backoff, device logic.
 """
+import os
+import sys
+import time
+import functools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from typing import Callable, List
+
+from utils import flatten_tensors, unflatten_tensors
+from .cache import CircuitCache, ResultCache, result_key, _key_bytes
+
+# least_busy() scans every device remotely; reuse the pick for this many seconds
+_BACKEND_TTL_S = 60
+_backend_cache = {}
+
+# Transpiles are cached on disk, so the expensive level is paid once per circuit
+_TRANSPILE_OPT_LEVEL = 3
+
+# Concurrent job submissions when a batch has to be split across several jobs
+_MAX_SUBMIT_WORKERS = 8
+
+def _target_fingerprint(backend):
+    # Device identity for cache keys: name, basis and coupling edges, so a recalibrated
+    # or re-wired device never reuses circuits or results from the old target
+    coupling = getattr(backend, 'coupling_map', None)
+    edges = sorted(coupling.get_edges()) if coupling else []
+    ident = repr((backend.name, sorted(getattr(backend, 'operation_names', ())), edges))
+    return sha256(ident.encode()).hexdigest()[:16]
+
+def _token_fingerprint():
+    # Short digest of the IBM credentials so cached providers follow env changes
+    creds = '|'.join(os.environ.get(k, '') for k in
+                     ('QISKIT_IBM_TOKEN', 'QISKIT_IBM_INSTANCE', 'QISKIT_IBM_CHANNEL'))
+    return sha256(creds.encode()).hexdigest()[:16]
+
+@functools.lru_cache(maxsize=1)
+def _cached_service(token_fingerprint):
+    from qiskit_ibm_runtime import QiskitRuntimeService  # lazy import
+    return QiskitRuntimeService()  # auto-discovers env vars
+
+def _get_service():
+    # One authenticated client per process (per credential set); set
+    # QSGD_REFRESH_SERVICE=1 to force a fresh login, e.g. in CI
+    if os.environ.get('QSGD_REFRESH_SERVICE') == '1':
+        _cached_service.cache_clear()
+    return _cached_service(_token_fingerprint())
+
+def _is_circuit_pair(out):
+    return (isinstance(out, tuple) and len(out) == 2
+            and hasattr(out[0], 'num_qubits') and hasattr(out[1], 'to_list'))
+
+def _simulate_pairs(outs):
+    # (qc, observable) outputs are evaluated exactly; circuits shared by several
+    # oracles are simulated once, then each observable is read off that state
+    states = {}
+    results = []
+    for out in outs:
+        if not _is_circuit_pair(out):
+            results.append(out)
+            continue
+        from qiskit.quantum_info import Statevector  # lazy import
+        qc, observable = out
+        key = _key_bytes(qc)
+        state = states.get(key)
+        if state is None:
+            state = states[key] = Statevector.from_instruction(qc)
+        results.append(state.expectation_value(observable).real)
+    return results
 
 class SimProvider:
-    def run_ae(self, oracles, shots, epsilon, mode):
+    def __init__(self, max_workers=None):
+        # Oracles run serially; max_workers > 1 opts into a thread pool, which helps
+        # oracles that do I/O or release the GIL in numpy/torch. Created on first use
+        self.max_workers = max_workers
+        self._pool = None
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    def _call_oracles(self, oracles):
+        if not self.max_workers or self.max_workers <= 1 or len(oracles) < 2:
+            return [oracle() for oracle in oracles]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        torch = sys.modules.get('torch')
+        if torch is None:
+            return list(self._pool.map(lambda oracle: oracle(), oracles))
+        # Grad mode is thread-local: carry the caller's (e.g. step()'s no_grad) over
+        enabled = torch.is_grad_enabled()
+        def call(oracle):
+            with torch.set_grad_enabled(enabled):
+                return oracle()
+        return list(self._pool.map(call, oracles))
+    def run_ae(self, oracles, shots, epsilon, mode, batched_oracle=None, inputs=None):
         # Classical fallback: simply return provided gradients or computed scalars
-        results = []
-        for oracle in oracles:
-            out = oracle()
-            # Support both direct tensors/scalars and (qc, observable)
-            results.append(out)
-        return results
+        if batched_oracle is not None and inputs:
+            # Batched path: evaluate once on all inputs packed into one flat tensor
+            return unflatten_tensors(batched_oracle(flatten_tensors(inputs)), inputs)
+        outs = self._call_oracles(oracles)
+        # Support both direct tensors/scalars and (qc, observable)
+        return _simulate_pairs(outs)
 
 
 class BraketProvider:
@@ -21,36 +118,160 @@ class BraketProvider:
         # Placeholder: batch AE circuits, submit jobs, handle polling
         raise NotImplementedError("AWS Braket provider integration required.")
 
-import os
-from typing import Callable, List
-
 class IBMProvider:
     def __init__(self):
         # Expects QISKIT_IBM_* in env; if missing, defer error and let caller fallback
         self._initialized = False
         self.service = None
         self.backend = None
+        self._cache = None
+        self._results = None
+        self._session = None
         self._authenticate()
 
     def _authenticate(self):
         # Will raise if env is not configured; caller handles fallback
-        from qiskit_ibm_runtime import QiskitRuntimeService  # lazy import
-        self.service = QiskitRuntimeService()  # auto-discovers env vars
-        self.backend = self.service.least_busy(operational=True, simulator=False)
+        self.service = _get_service()
+        self._select_backend()
         self._initialized = True
 
+    def _select_backend(self):
+        # least_busy() pick shared across providers for _BACKEND_TTL_S; run_ae calls
+        # this again once the pick expires so long runs follow device load/outages
+        key = _token_fingerprint()
+        cached = _backend_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _BACKEND_TTL_S:
+            picked_at, backend = cached
+        else:
+            backend = self.service.least_busy(operational=True, simulator=False)
+            picked_at = time.monotonic()
+            _backend_cache[key] = (picked_at, backend)
+        self._backend_picked_at = picked_at
+        if self.backend is not None and backend.name == self.backend.name:
+            return
+        self.backend = backend
+        self._target = f"{self.backend.name}-{_target_fingerprint(self.backend)}"
+        # One Estimator primitive per selected backend; shots are set per call
+        from qiskit_ibm_runtime import EstimatorV2 as Estimator  # lazy import
+        self._estimator = Estimator(self.backend)
+        self._last_shots = None
+
+    def _refresh_backend(self):
+        # An open Batch/Session is bound to its backend, so keep it until closed
+        if self._session is None and time.monotonic() - self._backend_picked_at >= _BACKEND_TTL_S:
+            self._select_backend()
+
+    def _transpile(self, qc):
+        # ISA circuits persist in CircuitCache keyed by (device target, circuit hash, opt level)
+        from qiskit import transpile  # lazy import
+        if self._cache is None:
+            self._cache = CircuitCache(None)
+        key = f"{self._target}-{self._cache._hash(qc)}-opt{_TRANSPILE_OPT_LEVEL}"
+        isa = self._cache.get(key)
+        if isa is None:
+            isa = transpile(qc, backend=self.backend, optimization_level=_TRANSPILE_OPT_LEVEL)
+            self._cache.set(key, isa)
+        return isa
+
+    def open_session(self, max_time=None, kind='batch'):
+        # Run later run_ae jobs inside a runtime Batch ('batch') or Session ('session'),
+        # so repeated calls queue back-to-back instead of each re-entering the queue
+        from qiskit_ibm_runtime import Batch, Session, EstimatorV2 as Estimator  # lazy import
+        self.close_session()
+        mode_cls = Batch if kind == 'batch' else Session
+        self._session = mode_cls(backend=self.backend, max_time=max_time)
+        self._session.__enter__()
+        self._estimator = Estimator(mode=self._session)
+        self._last_shots = None
+        return self._session
+
+    def close_session(self):
+        if self._session is None:
+            return
+        from qiskit_ibm_runtime import EstimatorV2 as Estimator  # lazy import
+        session, self._session = self._session, None
+        session.__exit__(None, None, None)
+        self._estimator = Estimator(self.backend)
+        self._last_shots = None
+
+    @contextlib.contextmanager
+    def session(self, max_time=None, kind='batch'):
+        # with provider.session(): ... -- open_session/close_session as a context manager
+        self.open_session(max_time=max_time, kind=kind)
+        try:
+            yield self
+        finally:
+            self.close_session()
+
+    def clear_cache(self):
+        # Drop memoized estimator results (memory and on-disk)
+        if self._results is None:
+            self._results = ResultCache()
+        self._results.clear()
+
     def run_ae(self, oracles: List[Callable], shots: int, epsilon: float, mode: str):
         # Each oracle must return (QuantumCircuit, observable) for estimation
-        results = []
-        from qiskit_ibm_runtime import EstimatorV2 as Estimator  # lazy import
-        for oracle in oracles:
-            qc, observable = oracle()
-            estimator = Estimator(self.backend)
-            estimator.options.default_shots = shots
-            job = estimator.run([(qc, observable, [])])  # No sweep params for basic use case
-            pub_result = job.result()[0]
-            estimate = pub_result.data.evs  # support scalar output
-            results.append(estimate)
+        self._refresh_backend()
+        if shots != self._last_shots:
+            self._estimator.options.default_shots = shots
+            self._last_shots = shots
+        # All oracles go out as PUBs of one job: a single queue wait for the batch.
+        # An oracle that fails to build is recorded in last_errors and left as None
+        # in the results instead of failing the whole batch.
+        # Circuits already run on this device with the same observable and shots
+        # within the result cache's TTL are answered without a hardware job, and
+        # duplicates within this batch are submitted once with the result scattered
+        # back to every index.
+        from qiskit.primitives.containers.estimator_pub import EstimatorPub  # lazy import
+        if self._results is None:
+            self._results = ResultCache()
+        results = [None] * len(oracles)
+        self.last_errors = {}
+        pubs = []
+        pub_targets = []  # per PUB: the oracle indices that receive its result
+        pub_keys = []
+        unique = {}
+        for idx, oracle in enumerate(oracles):
+            try:
+                qc, observable = oracle()
+                key = result_key(qc, observable, shots, self._target)
+                hit = self._results.get(key) if key is not None else None
+                if hit is not None:
+                    results[idx] = hit
+                    continue
+                dedup_key = key if key is not None else (_key_bytes(qc), repr(observable.to_list()))
+                if dedup_key in unique:
+                    pub_targets[unique[dedup_key]].append(idx)
+                    continue
+                qc = self._transpile(qc)
+                # Coerce/validate here so a malformed PUB lands in last_errors instead
+                # of making estimator.run() reject the whole batch
+                pub = EstimatorPub.coerce((qc, observable.apply_layout(qc.layout), []))  # No sweep params for basic use case
+                pub.validate()
+                pubs.append(pub)
+                unique[dedup_key] = len(pubs) - 1
+                pub_targets.append([idx])
+                pub_keys.append(key)
+            except Exception as e:
+                self.last_errors[idx] = e
+        if pubs:
+            # Batches beyond the device's per-job circuit limit are split; the chunks are
+            # submitted concurrently (each run() serializes and uploads its PUBs), then
+            # all results are collected in a second pass
+            limit = getattr(self.backend, 'max_circuits', None) or len(pubs)
+            chunks = [pubs[i:i + limit] for i in range(0, len(pubs), limit)]
+            if len(chunks) == 1:
+                jobs = [self._estimator.run(chunks[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(_MAX_SUBMIT_WORKERS, len(chunks))) as pool:
+                    jobs = list(pool.map(self._estimator.run, chunks))
+            pub_results = [r for job in jobs for r in job.result()]
+            for targets, key, pub_result in zip(pub_targets, pub_keys, pub_results):
+                evs = pub_result.data.evs  # support scalar output
+                for idx in targets:
+                    results[idx] = evs
+                if key is not None:
+                    self._results.set(key, evs)
         return results
 
 _provider_map = {
@@ -59,27 +280,31 @@ _provider_map = {
     'braket': BraketProvider,
 }
 
-def get_provider(backend, strict_local=False):
-    # Auto-detect best backend if requested
+@functools.lru_cache(maxsize=8)
+def _get_provider_cached(backend, strict_local, token_fingerprint):
+    # Raises if IBM auth fails; exceptions are not cached, so a later call retries
     if backend in (None, 'auto'):
         # Prefer IBM if credentials present; else use sim (classical)
         has_token = os.environ.get('QISKIT_IBM_TOKEN')
         has_instance = os.environ.get('QISKIT_IBM_INSTANCE')
         has_channel = os.environ.get('QISKIT_IBM_CHANNEL')
         if has_token and has_instance and has_channel and not strict_local:
-            try:
-                return IBMProvider()
-            except Exception:
-                # Fallback to classical if auth fails
-                return SimProvider()
+            return IBMProvider()
         return SimProvider()
     if strict_local or backend == 'sim':
         return SimProvider()
     if backend == 'ibm':
-        try:
-            return IBMProvider()
-        except Exception:
-            return SimProvider()
+        return IBMProvider()
     if backend == 'braket':
         return BraketProvider()
     raise ValueError(f"Unknown backend {backend}")
+
+def get_provider(backend, strict_local=False):
+    # Memoized per (backend, strict_local, credentials) so repeated optimizers skip re-auth
+    if backend not in (None, 'auto') and backend not in _provider_map and not strict_local:
+        raise ValueError(f"Unknown backend {backend}")
+    try:
+        return _get_provider_cached(backend, strict_local, _token_fingerprint())
+    except Exception:
+        # Fallback to classical if auth fails
+        return SimProvider()
@@ -1,26 +1,100 @@
 """
 Async job manager, retry/failover logic, and batching for quantum jobs.
 """
+import sys
+import time
+import random
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Transient failures worth retrying; anything else (auth, validation) fails fast
+RETRYABLE = (ConnectionError, TimeoutError)
+
+def _default_retryable():
+    # Add IBM job failures only if the runtime SDK is already loaded (never import it here)
+    runtime = sys.modules.get('qiskit_ibm_runtime')
+    if runtime is None:
+        return RETRYABLE
+    try:
+        from qiskit_ibm_runtime.exceptions import RuntimeJobFailureError
+    except Exception:
+        return RETRYABLE
+    return RETRYABLE + (RuntimeJobFailureError,)
+
+def _backoff_delay(attempt, base, cap):
+    # Capped exponential backoff with +/-50% jitter so parallel workers don't retry in lockstep
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+def _is_job_handle(obj):
+    # IBM RuntimeJob and concurrent Futures both expose done()/result()
+    return callable(getattr(obj, 'done', None)) and callable(getattr(obj, 'result', None))
+
+def _run_sync(coro):
+    # asyncio.run() refuses to start inside a running loop (Jupyter, async callers);
+    # there, run the coroutine on its own loop in a helper thread instead
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as runner:
+        return runner.submit(asyncio.run, coro).result()
 
 class Scheduler:
-    def __init__(self):
-        try:
-            self.loop = asyncio.get_event_loop()
-        except RuntimeError:
-            self.loop = asyncio.new_event_loop()
-    def batch_jobs(self, jobs, max_parallel=2):
-        # Schedule jobs in parallel, return when all done
-        async def run_all():
-            return await asyncio.gather(*(self.loop.run_in_executor(None, job) for job in jobs))
-        return self.loop.run_until_complete(run_all())
-    def retry(self, func, max_retries=2, backoff=2):
-        # Idempotent retry, exponential backoff
+    def __init__(self, poll_interval=1.0, max_poll_interval=30.0):
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+    def batch_jobs(self, jobs, max_parallel=2, max_retries=0):
+        # Run jobs on at most max_parallel threads, return results in job order.
+        # A job may return a job handle (e.g. RuntimeJob); it is then polled
+        # asynchronously so the worker can submit the next job meanwhile.
+        if max_retries:
+            jobs = [(lambda j=job: self.retry(j, max_retries=max_retries)) for job in jobs]
+        return _run_sync(self._run_queue(jobs, max_parallel))
+    async def _run_queue(self, jobs, max_parallel):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        for item in enumerate(jobs):
+            queue.put_nowait(item)
+        results = [None] * len(jobs)
+        polls = []
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            async def collect(idx, handle):
+                await self.poll(handle)
+                results[idx] = await loop.run_in_executor(pool, handle.result)
+            async def worker():
+                while not queue.empty():
+                    idx, job = queue.get_nowait()
+                    out = await loop.run_in_executor(pool, job)
+                    if _is_job_handle(out):
+                        polls.append(asyncio.ensure_future(collect(idx, out)))
+                    else:
+                        results[idx] = out
+            await asyncio.gather(*(worker() for _ in range(max_parallel)))
+            await asyncio.gather(*polls)
+        return results
+    async def poll(self, handle):
+        # Yield to the loop between status checks, backing off up to max_poll_interval
+        delay = self.poll_interval
+        while not handle.done():
+            await asyncio.sleep(delay)
+            delay = min(self.max_poll_interval, delay * 2)
+    def retry(self, func, max_retries=2, base=1.0, cap=60.0, retryable=None):
+        # Idempotent retry on transient errors only, capped exponential backoff with jitter
+        retryable = retryable or _default_retryable()
         for i in range(max_retries+1):
             try:
                 return func()
-            except Exception as e:
+            except retryable:
+                if i == max_retries:
+                    raise
+                time.sleep(_backoff_delay(i, base, cap))
+    async def retry_async(self, func, max_retries=2, base=1.0, cap=60.0, retryable=None):
+        # Same policy as retry() for coroutine functions; sleeps without blocking the loop
+        retryable = retryable or _default_retryable()
+        for i in range(max_retries+1):
+            try:
+                return await func()
+            except retryable:
                 if i == max_retries:
                     raise
-                import time
-                time.sleep(backoff ** i)
+                await asyncio.sleep(_backoff_delay(i, base, cap))
@@ -1,14 +1,20 @@
-import os
+from __future__ import annotations
+
 import sys
-import time
 import traceback
 import math
 import argparse
+import functools
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from typing import List, Tuple
-from qiskit import QuantumCircuit, transpile
-from qiskit.quantum_info import SparsePauliOp, Statevector
-from qiskit_ibm_runtime import QiskitRuntimeService
+from typing import TYPE_CHECKING, List, Tuple
+
+# Qiskit is imported inside the functions that use it, so importing this module
+# (e.g. during test collection) does not load the Qiskit/runtime stack
+if TYPE_CHECKING:
+    from qiskit import QuantumCircuit
+    from qiskit.quantum_info import SparsePauliOp
 
 SHOTS = 512  # Lower shot count for minimal quota use (can bump for --thorough)
 EPSILON = 0.05
@@ -23,78 +29,176 @@ EXIT_OK = 0
 EXIT_FAIL = 1
 EXIT_ERROR = 2
 
+# Backends by name, so the transpile cache can be keyed on a hashable string
+_backend_registry = {}
+
+@functools.lru_cache(maxsize=None)
+def _pass_manager(backend_name: str, opt_level: int, trivial_layout: bool = False):
+    # Preset pass managers are built once per configuration, not per transpile() call.
+    # trivial_layout pins virtual qubit i to physical qubit i, which is all the
+    # single-qubit axis circuits need (and keeps their padded observables aligned).
+    from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager  # lazy import
+    backend = _backend_registry[backend_name]
+    if trivial_layout:
+        return generate_preset_pass_manager(backend=backend, optimization_level=opt_level,
+                                            initial_layout=list(range(backend.num_qubits)))
+    return generate_preset_pass_manager(backend=backend, optimization_level=opt_level)
+
+@functools.lru_cache(maxsize=1)
+def _disk_cache():
+    # Transpiled circuits persist across runs in the package's CircuitCache (QPY+zstd)
+    from quantum.cache import CircuitCache
+    return CircuitCache(None)
+
+@functools.lru_cache(maxsize=None)
+def _backend_fingerprint(backend_name: str) -> str:
+    # Device identity for persisted transpiles: the provider's target fingerprint, so a
+    # recalibrated coupling map or basis change invalidates both caches the same way
+    from quantum.providers import _target_fingerprint
+    return _target_fingerprint(_backend_registry[backend_name])
+
+@functools.lru_cache(maxsize=1024)
+def _cached_transpile(qasm: str, backend_name: str, opt_level: int, trivial_layout: bool = False) -> QuantumCircuit:
+    # Keyed on canonical QASM: repeated axis/batch circuits skip the pass manager,
+    # in memory within a run and via the on-disk cache across runs.
+    # The returned circuit is shared; callers must not mutate it.
+    from qiskit import qasm2  # lazy import
+    key = blake2b(f"{qasm}|{_backend_fingerprint(backend_name)}|{opt_level}|{trivial_layout}".encode(),
+                  digest_size=16).hexdigest()
+    isa = _disk_cache().get(key)
+    if isa is None:
+        isa = _pass_manager(backend_name, opt_level, trivial_layout).run(qasm2.loads(qasm))
+        _disk_cache().set(key, isa)
+    return isa
+
+def _transpile_parametric(qc: QuantumCircuit, backend_name: str, opt_level: int = 1) -> QuantumCircuit:
+    # Parameterized templates have no QASM 2 form, so the disk cache is keyed on circuit
+    # structure instead; QPY keeps the Parameters, angles are still bound per PUB
+    cache = _disk_cache()
+    key = blake2b(f"{cache._hash(qc)}|{_backend_fingerprint(backend_name)}|{opt_level}".encode(),
+                  digest_size=16).hexdigest()
+    isa = cache.get(key)
+    if isa is None:
+        isa = _pass_manager(backend_name, opt_level).run(qc)
+        cache.set(key, isa)
+    return isa
+
 def info(msg): print(f"{BOLD}[info]{ENDC} {msg}")
 def warn(msg): print(f"{WARN}{msg}{ENDC}")
 def err(msg): print(f"{FAIL}{msg}{ENDC}")
 def ok(msg): print(f"{OK}{msg}{ENDC}")
 
-def show_backend_info(backend):
+def show_backend_info(backend, cfg=None):
+    # configuration()/status() can each be a remote fetch; take each once, concurrently
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        status_f = pool.submit(backend.status)
+        cfg = cfg or backend.configuration()
+        status = status_f.result()
     print("\n--- Backend Information ---")
     print(f"Name: {backend.name}")
-    print(f"Qubits: {backend.configuration().num_qubits}")
-    print(f"Basis Gates: {backend.configuration().basis_gates}")
-    print(f"Max shots: {backend.configuration().max_shots}")
-    print(f"Status: {'operational' if backend.status().operational else 'not operational'}")
-    print(f"Pending jobs: {backend.status().pending_jobs}")
+    print(f"Qubits: {cfg.num_qubits}")
+    print(f"Basis Gates: {cfg.basis_gates}")
+    print(f"Max shots: {cfg.max_shots}")
+    print(f"Status: {'operational' if status.operational else 'not operational'}")
+    print(f"Pending jobs: {status.pending_jobs}")
     print("--------------------------\n")
 
 def list_backends(service):
+    # Per-backend configuration() is a metadata RPC; fan them out instead of N serial calls
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        infos = list(pool.map(lambda b: (b.name, b.configuration().num_qubits), service.backends()))
     print("\nAvailable IBM Quantum Backends:")
-    for backend in service.backends():
-        print(f"- {backend.name} ({backend.configuration().num_qubits} qubits)")
+    for name, num_qubits in infos:
+        print(f"- {name} ({num_qubits} qubits)")
     print()
 
 def assert_close(val, ref, atol=0.35):
     if abs(val - ref) > atol:
         raise AssertionError(f"Result {val} not within tolerance {atol} of expected {ref}")
 
-def build_oracle(axis: str, num_qubits: int) -> Tuple[QuantumCircuit, SparsePauliOp]:
-    # One-qubit operation but padded to device; e.g., 'ZIII...I'
+# Single-qubit preparation per measured axis, and the closed-form expectation of the
+# prepared state that the axis test asserts against (no simulation needed)
+_AXIS_PREP = {
+    'Z': lambda qc: qc.id(0),
+    'X': lambda qc: qc.h(0),
+    'Y': lambda qc: (qc.sdg(0), qc.h(0)),
+}
+_AXIS_REF = {
+    'Z': 1.0,  # |0>: <Z> = 1
+    'X': 1.0,  # H|0> = |+>: <X> = 1
+    'Y': 0.0,  # H Sdg|0> = |+>: <Y> = 0
+}
+
+@functools.lru_cache(maxsize=None)
+def _pauli_label(axis: str, num_qubits: int) -> str:
+    # One-qubit Pauli on qubit 0, padded to device width; e.g., 'ZIII...I'
+    return axis + 'I' * (num_qubits - 1)
+
+@functools.lru_cache(maxsize=512)
+def _pauli_obs(label: str) -> SparsePauliOp:
+    # Shared, cached observable: callers must not mutate it (apply_layout returns a copy)
+    from qiskit.quantum_info import SparsePauliOp  # lazy import
+    return SparsePauliOp.from_list([(label, 1)])
+
+@functools.lru_cache(maxsize=None)
+def _axis_template(axis: str, num_qubits: int) -> QuantumCircuit:
+    from qiskit import QuantumCircuit  # lazy import
     qc = QuantumCircuit(num_qubits)
-    if axis == 'Z':
-        qc.id(0)
-        label = 'Z' + 'I' * (num_qubits - 1)
-        reference = 1.0  # |0> state expectation <Z> = 1
-    elif axis == 'X':
-        qc.h(0)
-        label = 'X' + 'I' * (num_qubits - 1)
-        reference = 0.0  # <X|0> = 0
-    elif axis == 'Y':
-        qc.sdg(0); qc.h(0)
-        label = 'Y' + 'I' * (num_qubits - 1)
-        reference = 0.0  # <Y|0> = 0
-    else:
+    _AXIS_PREP[axis](qc)
+    return qc
+
+def build_oracle(axis: str, num_qubits: int) -> Tuple[QuantumCircuit, SparsePauliOp]:
+    if axis not in _AXIS_PREP:
         raise ValueError(f"Unknown axis {axis}")
-    observable = SparsePauliOp.from_list([(label, 1)])
-    return qc, observable, reference
+    # Copy so callers may modify the circuit without corrupting the cached template
+    qc = _axis_template(axis, num_qubits).copy()
+    observable = _pauli_obs(_pauli_label(axis, num_qubits))
+    return qc, observable, _AXIS_REF[axis]
 
-def build_parametric_oracle(num_qubits: int, angle: float) -> Tuple[QuantumCircuit, SparsePauliOp]:
+def build_parametric_template(num_qubits: int) -> Tuple[QuantumCircuit, SparsePauliOp]:
+    # One RY(theta) template; sweep angles are bound at run time as PUB parameter values
+    from qiskit import QuantumCircuit  # lazy import
+    from qiskit.circuit import Parameter
     qc = QuantumCircuit(num_qubits)
-    qc.ry(angle, 0)
-    label = 'Z' + 'I' * (num_qubits - 1)
-    observable = SparsePauliOp.from_list([(label, 1)])
+    qc.ry(Parameter("theta"), 0)
+    observable = _pauli_obs(_pauli_label('Z', num_qubits))
     return qc, observable
 
 # Thorough multi-qubit GHZ test (2-qubit GHZ/Bell to avoid quota explosion)
 def build_ghz(nq=2):
+    from qiskit import QuantumCircuit  # lazy import
     qc = QuantumCircuit(nq)
     qc.h(0)
     for i in range(1, nq):
         qc.cx(0, i)
     label = 'Z' * nq
-    observable = SparsePauliOp.from_list([(label, 1)])
+    observable = _pauli_obs(label)
     return qc, observable, nq
 
-def run_estimator(qc: QuantumCircuit, observable: SparsePauliOp, backend, shots=SHOTS):
+def run_estimator(qc: QuantumCircuit, observable: SparsePauliOp, backend, shots=SHOTS,
+                  opt_level=1, trivial_layout=False):
+    from qiskit import qasm2  # lazy import
     from qiskit_ibm_runtime import EstimatorV2 as Estimator
     estimator = Estimator(backend)
     estimator.options.default_shots = shots
-    qc = transpile(qc, backend=backend)
+    qc = _cached_transpile(qasm2.dumps(qc), backend.name, opt_level, trivial_layout)
     job = estimator.run([(qc, observable, [])])
     pub_result = job.result()[0]
     return pub_result.data.evs
 
+def run_parametric_expectation(backend, num_qubits: int, angles, shots=SHOTS) -> List[float]:
+    # Whole sweep as a single PUB: transpile the template once, bind every angle in one job
+    from qiskit_ibm_runtime import EstimatorV2 as Estimator  # lazy import
+    tpl, observable = build_parametric_template(num_qubits)
+    tpl = _transpile_parametric(tpl, backend.name)
+    estimator = Estimator(backend)
+    estimator.options.default_shots = shots
+    job = estimator.run([(tpl, observable.apply_layout(tpl.layout), np.asarray(angles).reshape(-1, 1))])
+    return list(job.result()[0].data.evs)
+
 def main():
+    from qiskit import QuantumCircuit, qasm2  # lazy import
+    from qiskit_ibm_runtime import QiskitRuntimeService, EstimatorV2 as Estimator
     parser = argparse.ArgumentParser(description="Test QSGD IBM Quantum Integration")
     parser.add_argument('--thorough', '-t', action='store_true', help='Run all heavy/extra-cost quantum tests (GHZ, batch, sweeps)')
     args = parser.parse_args()
@@ -111,9 +215,11 @@ def main():
         err("No available IBM Quantum devices found! Exiting.")
         sys.exit(EXIT_ERROR)
     backend = service.least_busy(operational=True, simulator=False)
-    show_backend_info(backend)
+    _backend_registry[backend.name] = backend
+    cfg = backend.configuration()
+    num_qubits = cfg.num_qubits
+    show_backend_info(backend, cfg)
     list_backends(service)
-    num_qubits = backend.configuration().num_qubits
 
     # Minimal tests
     info("Running minimal, fast single-qubit quantum expectation tests (Z/X/Y axes)...")
@@ -121,7 +227,8 @@ def main():
     for axis in axes:
         try:
             qc, observable, reference = build_oracle(axis, num_qubits)
-            result = run_estimator(qc, observable, backend)
+            # Trivial one-gate circuits: level 0 on a fixed layout, no layout/routing search
+            result = run_estimator(qc, observable, backend, opt_level=0, trivial_layout=True)
             ok(f"<Expected {axis}({reference})> Got: {result:.4f}")
             assert_close(result, reference)
         except Exception as ex:
@@ -130,33 +237,33 @@ def main():
     # Thorough and compute-intensive tests only with flag
     if args.thorough:
         warn("Running thorough test suite — these use more shots and more circuit executions!")
+        # Loop-invariant for every thorough test: one Estimator for the size-mismatch
+        # and batch checks
+        estimator = Estimator(backend)
+        estimator.options.default_shots = SHOTS
 
         # Parametric sweep test
         info("Performing parametric RY sweep with Estimator...")
         thetas = np.linspace(0, 2*math.pi, 5)
         theory = np.cos(thetas)
         try:
-            yvals = []
-            for theta, expect_val in zip(thetas, theory):
-                qc, observable = build_parametric_oracle(num_qubits, theta)
-                result = run_estimator(qc, observable, backend)
+            yvals = run_parametric_expectation(backend, num_qubits, thetas)
+            for theta, result, expect_val in zip(thetas, yvals, theory):
                 ok(f"  theta={theta:.3f} | Hardware={result:.3f} | Theory={expect_val:.3f}")
                 assert_close(result, expect_val, atol=0.55)  # Looser for hardware noise
-                yvals.append(result)
         except Exception as ex:
             err(f"RY parametric sweep FAILED: {ex}")
 
         # GHZ/Bell state test (minimal, 2-qubit)
         info("Testing 2-qubit GHZ state <ZZ>")
         try:
-            qc, observable, n_ghz = build_ghz(2)
+            qc, observable, _ = build_ghz(2)
             # Pad circuit to match backend
             if num_qubits > 2:
                 pad_qc = QuantumCircuit(num_qubits)
                 pad_qc.compose(qc, qubits=range(2), inplace=True)
                 qc = pad_qc
-                label = 'Z' * 2 + 'I' * (num_qubits - 2)
-                observable = SparsePauliOp.from_list([(label, 1)])
+                observable = _pauli_obs('ZZ' + 'I' * (num_qubits - 2))
             result = run_estimator(qc, observable, backend)
             ok(f"<ZZ> on 2-qubit GHZ | Hardware={result:.3f} | Theory=1")
             assert_close(result, 1, atol=0.40)
@@ -168,10 +275,7 @@ def main():
         try:
             qc = QuantumCircuit(2)
             qc.h(0)
-            observable = SparsePauliOp.from_list([('Z', 1)])  # Single-qubit obs on 2-qubit circuit
-            from qiskit_ibm_runtime import EstimatorV2 as Estimator
-            estimator = Estimator(backend)
-            estimator.options.default_shots = SHOTS
+            observable = _pauli_obs('Z')  # Single-qubit obs on 2-qubit circuit
             estimator.run([(qc, observable, [])])
             err("ERROR: No failure raised for intentional size mismatch!")
         except Exception as e:
@@ -182,18 +286,10 @@ def main():
         try:
             circuits = []
             obs = []
-            for i in range(2):
-                qc = QuantumCircuit(num_qubits)
-                if i == 0:
-                    qc.h(0)
-                else:
-                    qc.id(0)
-                circuits.append(transpile(qc, backend=backend))
-                label = ('X' if i == 0 else 'Z') + 'I' * (num_qubits - 1)
-                obs.append(SparsePauliOp.from_list([(label, 1)]))
-            from qiskit_ibm_runtime import EstimatorV2 as Estimator
-            estimator = Estimator(backend)
-            estimator.options.default_shots = SHOTS
+            for axis in ('X', 'Z'):
+                qc = _axis_template(axis, num_qubits)
+                circuits.append(_cached_transpile(qasm2.dumps(qc), backend.name, 0, True))
+                obs.append(_pauli_obs(_pauli_label(axis, num_qubits)))
             instances = [(c, o, []) for c, o in zip(circuits, obs)]
             batch_results = [r.data.evs for r in estimator.run(instances).result()]
             for idx, r in enumerate(batch_results):
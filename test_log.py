@@ -0,0 +1,30 @@
+"""
+Logger JSONL output: non-finite and numpy-scalar stats round-trip like stdlib json.
+"""
+import json
+import math
+
+import pytest
+
+from log import Logger
+
+def _records(logger):
+    logger.close()
+    with open(logger.jsonl_path) as f:
+        return [json.loads(line) for line in f]
+
+def test_nonfinite_loss_is_kept(tmp_path):
+    logger = Logger(log_dir=str(tmp_path))
+    logger.log_step({'loss': float('nan'), 'fallback': False})
+    logger.log_step({'loss': float('inf'), 'fallback': False})
+    first, second = _records(logger)
+    assert math.isnan(first['loss'])
+    assert second['loss'] == math.inf
+
+def test_numpy_scalar_stats(tmp_path):
+    np = pytest.importorskip("numpy")
+    logger = Logger(log_dir=str(tmp_path))
+    logger.log_step({'loss': np.float64(0.5), 'ae_precision': np.float32(0.25), 'fallback': False})
+    (record,) = _records(logger)
+    assert record['loss'] == 0.5
+    assert record['ae_precision'] == 0.25
@@ -0,0 +1,54 @@
+"""
+SGD_QAE's classical update must match torch.optim.SGD step for step.
+"""
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from optim.sgd_qae import SGD_QAE
+
+CONFIGS = {
+    "plain": dict(momentum=0.0, weight_decay=0.0, nesterov=False),
+    "momentum": dict(momentum=0.9, weight_decay=0.0, nesterov=False),
+    "nesterov": dict(momentum=0.9, weight_decay=0.0, nesterov=True),
+    "weight_decay": dict(momentum=0.0, weight_decay=1e-2, nesterov=False),
+    "momentum_weight_decay": dict(momentum=0.5, weight_decay=1e-2, nesterov=True),
+}
+
+def _params(seed):
+    gen = torch.Generator().manual_seed(seed)
+    return [torch.randn(4, 3, generator=gen, requires_grad=True),
+            torch.randn(3, generator=gen, requires_grad=True),
+            torch.randn(2, 2, generator=gen, requires_grad=True),
+            torch.randn(5, generator=gen, requires_grad=True)]  # never gets a grad
+
+def _groups(params):
+    # Two groups with different hyperparameters; the second mixes in a frozen param
+    return [
+        {"params": params[:2]},
+        {"params": params[2:], "lr": 0.05, "momentum": 0.3, "nesterov": False, "weight_decay": 0.0},
+    ]
+
+@pytest.mark.parametrize("name", sorted(CONFIGS))
+def test_matches_torch_sgd(name, tmp_path):
+    cfg = CONFIGS[name]
+    ref_params, qae_params = _params(0), _params(0)
+    ref = torch.optim.SGD(_groups(ref_params), lr=0.1, **cfg)
+    qae = SGD_QAE(_groups(qae_params), lr=0.1, use_quantum=False, backend="sim",
+                  strict_local=True, log_dir=str(tmp_path), **cfg)
+    gen = torch.Generator().manual_seed(1)
+    for _ in range(5):
+        for ref_p, qae_p in zip(ref_params[:3], qae_params[:3]):
+            g = torch.randn(ref_p.shape, generator=gen)
+            ref_p.grad, qae_p.grad = g.clone(), g.clone()
+        ref.step()
+        qae.step()
+        for ref_p, qae_p in zip(ref_params, qae_params):
+            torch.testing.assert_close(qae_p, ref_p)
+            ref_buf = ref.state[ref_p].get("momentum_buffer")
+            qae_buf = qae.state[qae_p].get("momentum_buffer")
+            if ref_buf is None:
+                assert qae_buf is None
+            else:
+                torch.testing.assert_close(qae_buf, ref_buf)
+    qae.logger.close()
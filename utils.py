@@ -0,0 +1,52 @@
+"""
+Shared helpers: lazy optional-dependency probes (HAS_TORCH, HAS_QISKIT, HAS_BRAKET),
+lazy package exports, flat-buffer packing of tensor lists.
+"""
+import sys
+import importlib
+
+
+class LazyImportTester:
+    """Truthy if every named module imports; the import is only attempted on first use."""
+    def __init__(self, *names):
+        self.names = names
+        self._ok = None
+    def __bool__(self):
+        if self._ok is None:
+            try:
+                for name in self.names:
+                    importlib.import_module(name)
+                self._ok = True
+            except Exception:
+                self._ok = False
+        return self._ok
+
+HAS_TORCH = LazyImportTester('torch')
+HAS_QISKIT = LazyImportTester('qiskit')
+HAS_BRAKET = LazyImportTester('braket')
+
+
+def lazy_exports(module_name, mapping):
+    """PEP 562 `(__getattr__, __dir__)` for a package: each name in `mapping` is imported
+    from its (relative) submodule on first attribute access, then cached on the package."""
+    module = sys.modules[module_name]
+    def __getattr__(name):
+        if name in mapping:
+            value = getattr(importlib.import_module(mapping[name], module_name), name)
+            setattr(module, name, value)
+            return value
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+    def __dir__():
+        return sorted(set(vars(module)) | set(mapping))
+    return __getattr__, __dir__
+
+def flatten_tensors(tensors):
+    # One contiguous 1-D buffer for a list of tensors (single alloc/copy instead of N)
+    import torch
+    return torch.cat([t.reshape(-1) for t in tensors])
+
+def unflatten_tensors(flat, like):
+    # Inverse of flatten_tensors: views into `flat` shaped like each tensor in `like`
+    import torch
+    chunks = torch.split(flat, [t.numel() for t in like])
+    return [c.view_as(t) for c, t in zip(chunks, like)]